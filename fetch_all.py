@@ -0,0 +1,174 @@
+# fetch_all.py
+# 统一抓取 feeds 列表：线程池并发 + 条件 GET（ETag / Last-Modified），
+# 并把当天的解析结果存成 cache/feeds-YYYY-MM-DD.pkl，供各爬虫脚本复用，同一天内只抓一次。
+import os
+import glob
+import json
+import socket
+import pickle
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import feedparser
+
+# RSS 源列表
+FEEDS_FILE = "feeds1011.txt"
+
+# 条件 GET 缓存：feeds.json 记录 url -> {"etag", "modified", "path"}，path 指向上次解析结果的 pickle
+CACHE_DIR = "cache"
+FEED_CACHE_INDEX = os.path.join(CACHE_DIR, "feeds.json")
+
+# 单个源的网络超时（秒），避免一个慢源拖住整个线程池
+FETCH_TIMEOUT = 20
+MAX_WORKERS = 16
+
+def read_feed_urls(path: str = FEEDS_FILE) -> list[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def day_cache_file(d) -> str:
+    return os.path.join(CACHE_DIR, f"feeds-{d.strftime('%Y-%m-%d')}.pkl")
+
+def prune_day_caches(keep: str) -> None:
+    """
+    当日 pickle 只对同一天内的重跑有用：写入今天的文件时删掉其它日期的，避免 cache/ 无限增长。
+    """
+    for old in glob.glob(os.path.join(CACHE_DIR, "feeds-*.pkl")):
+        if os.path.abspath(old) != os.path.abspath(keep):
+            try:
+                os.remove(old)
+            except OSError as e:
+                print(f"Skip removing {old} due to error: {e}")
+
+def slim_feed(feed) -> feedparser.FeedParserDict:
+    """
+    只保留下游用到的 feed / entries / status，便于 pickle（headers、bozo_exception 等不落盘）。
+    """
+    return feedparser.FeedParserDict(
+        feed=feed.get("feed", {}),
+        entries=feed.get("entries", []),
+        status=feed.get("status"),
+    )
+
+def is_ok(feed) -> bool:
+    status = feed.get("status")
+    return bool(status) and status < 400
+
+def is_not_modified(feed) -> bool:
+    """
+    是否为 304。经过重定向时 feedparser 把 status 报成重定向码（301/302/...），
+    此时只能靠它在 304 分支里写入的 debug_message 判断。
+    """
+    return feed.get("status") == 304 or bool(feed.get("debug_message"))
+
+def load_feed_cache() -> dict:
+    """
+    读取条件 GET 缓存索引；不存在或损坏时返回空表（相当于全量抓取）。
+    """
+    try:
+        with open(FEED_CACHE_INDEX, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_feed_cache(feed_cache: dict) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(FEED_CACHE_INDEX, "w", encoding="utf-8") as f:
+        json.dump(feed_cache, f, ensure_ascii=False, indent=2)
+
+def fetch(url: str, prev: dict | None = None):
+    """
+    抓取并解析单个 RSS 源（在线程池中执行，只做网络 I/O + 解析，不碰共享状态）。
+    带上次的 ETag / Last-Modified 做条件 GET：
+    - 304：直接复用 pickle 里的解析结果
+    - 其它：落盘新的解析结果，并返回新的缓存元信息（由主线程写回索引）
+    返回 (url, feed, cache_meta)，cache_meta 为 None 表示索引不变。
+    """
+    prev = prev or {}
+    path = prev.get("path")
+    if path and os.path.exists(path):
+        feed = feedparser.parse(url, etag=prev.get("etag"), modified=prev.get("modified"))
+        if is_not_modified(feed):
+            try:
+                with open(path, "rb") as f:
+                    cached = pickle.load(f)
+                cached["status"] = 304
+                return url, feedparser.FeedParserDict(cached), None
+            except Exception:
+                # pickle 损坏：退回无条件抓取
+                feed = feedparser.parse(url)
+    else:
+        feed = feedparser.parse(url)
+
+    feed_slim = slim_feed(feed)
+    etag = feed.get("etag")
+    modified = feed.get("modified")
+    # feedparser 跟随重定向后 status 为 301/302/307/308：只要不是错误和 304，带校验头就缓存
+    if not is_ok(feed) or is_not_modified(feed) or not (etag or modified):
+        return url, feed_slim, None
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".pkl")
+    try:
+        with open(path, "wb") as f:
+            pickle.dump(dict(feed_slim), f)
+    except Exception as e:
+        print(f"Skip caching {url} due to error: {e}")
+        return url, feed_slim, None
+    return url, feed_slim, {"etag": etag, "modified": modified, "path": path}
+
+def fetch_feeds(urls: list[str]) -> dict:
+    """
+    并发抓取一组源，返回 {url: parsed_feed}（保持 urls 顺序）。
+    """
+    if not urls:
+        return {}
+    socket.setdefaulttimeout(FETCH_TIMEOUT)
+    feed_cache = load_feed_cache()
+    feeds = {}
+    # 304 也并行；缓存索引在主线程里写回，无需加锁
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(urls))) as ex:
+        results = ex.map(fetch, urls, [feed_cache.get(u) for u in urls])
+        for url, feed, cache_meta in results:
+            if cache_meta:
+                feed_cache[url] = cache_meta
+            feeds[url] = feed
+    save_feed_cache(feed_cache)
+    return feeds
+
+def load_or_fetch(today=None, urls: list[str] | None = None) -> dict:
+    """
+    返回当天的 {url: parsed_feed}：
+    已有 cache/feeds-YYYY-MM-DD.pkl 则直接读取，只补抓其中缺少的源；否则全部抓取并写入。
+    """
+    if today is None:
+        today = datetime.now(timezone.utc).date()
+    if urls is None:
+        urls = read_feed_urls()
+
+    path = day_cache_file(today)
+    cached = {}
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Ignore {path} due to error: {e}")
+
+    missing = [u for u in urls if u not in cached]
+    if missing:
+        fetched = fetch_feeds(missing)
+        # 抓取失败（无状态码或 4xx/5xx）的源不写入当日缓存，下次运行会重试
+        cached.update({u: feed for u, feed in fetched.items() if is_ok(feed)})
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(cached, f)
+        prune_day_caches(path)
+        return {u: fetched[u] if u in fetched else cached[u] for u in urls}
+
+    return {u: cached[u] for u in urls}
+
+if __name__ == "__main__":
+    feeds = load_or_fetch()
+    print(f"Fetched {len(feeds)} feeds → {day_cache_file(datetime.now(timezone.utc).date())}")
@@ -1,17 +1,34 @@
 import os
 import re
-import feedparser
-import pandas as pd
+import csv
+import fetch_all
+import pyarrow as pa
+import pyarrow.parquet as pq
 from html import unescape
+from dateutil import parser as dateutil_parser
+from selectolax.lexbor import LexborHTMLParser
 from datetime import datetime, timedelta, timezone
 
+# 输出 CSV 的列（weekly_aggregate 读取同样的列）
+OUTPUT_COLUMNS = ["title", "link", "published", "source", "pub_date"]
+# 同内容的 parquet 副本：pub_date 保留为 UTC 时间戳，周汇总无需再解析
+PARQUET_SCHEMA = pa.schema([
+    ("title", pa.string()),
+    ("link", pa.string()),
+    ("published", pa.string()),
+    ("source", pa.string()),
+    ("pub_date", pa.timestamp("us", tz="UTC")),
+])
+
 # ---------- 正则与工具 ----------
 
+# <img alt="..."> 的正则版本：仅在 HTML 解析器出错时兜底
 ALT_IMG_RE = re.compile(
     r'<img\b[^>]*\balt\s*=\s*(?P<q>["\'])(?P<alt>.*?)(?P=q)[^>]*>',
     flags=re.IGNORECASE | re.DOTALL
 )
 TAG_RE = re.compile(r"<[^>]+>")  # 去 HTML 标签
+WS_RE = re.compile(r"\s+")       # 合并空白
 
 # 从 description 中抓取 "Available online 10 October 2025" 的日期
 AVAILABLE_ONLINE_RE = re.compile(
@@ -32,30 +49,41 @@ MONTHS = {
     "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12
 }
 
+# 常见乱码替换表（多字符键先整体替换，单字符键再一次 translate）
+MOJIBAKE_REPL = {
+    "鈥�": "'",  # 左/右单引号被错误解码的常见表现
+    "鈥": "'",    # 宽松替换，尽量别过度
+    "â": "'",  # UTF-8→Win1252 典型
+    "â": "-",  # en dash
+    "â": "-",  # em dash
+    "â": '"',
+    "â": '"',
+}
+# 多字符键：一次预编译的交替正则，长键优先，保证 "鈥�" 先于 "鈥" 命中
+_MULTI_MAP = {k: v for k, v in MOJIBAKE_REPL.items() if len(k) > 1}
+_MULTI_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(_MULTI_MAP, key=len, reverse=True))
+) if _MULTI_MAP else None
+# 单字符键：str.translate 一遍扫完
+_SINGLE_TRANS = str.maketrans({k: v for k, v in MOJIBAKE_REPL.items() if len(k) == 1})
+
 def clean_html_text(s: str) -> str:
     if not s:
         return ""
     s = unescape(s)             # HTML 实体反转义
+    if "<" not in s:            # 纯文本（多数标题）：不走正则
+        return " ".join(s.split())
     s = TAG_RE.sub("", s)       # 去标签
-    s = re.sub(r"\s+", " ", s)  # 合并空白
+    s = WS_RE.sub(" ", s)       # 合并空白
     return s.strip()
 
 def fix_mojibake(s: str) -> str:
-    # 处理常见的“鈥�”等引号乱码
+    # 处理常见的“鈥�”等引号乱码：多字符键一次 re.sub + 单字符键一次 translate
     if not s:
         return s
-    repl = {
-        "鈥�": "'",  # 左/右单引号被错误解码的常见表现
-        "鈥": "'",    # 宽松替换，尽量别过度
-        "â": "'",  # UTF-8→Win1252 典型
-        "â": "-",  # en dash
-        "â": "-",  # em dash
-        "â": '"',
-        "â": '"',
-    }
-    for k, v in repl.items():
-        s = s.replace(k, v)
-    return s
+    if _MULTI_RE is not None:
+        s = _MULTI_RE.sub(lambda m: _MULTI_MAP[m.group(0)], s)
+    return s.translate(_SINGLE_TRANS)
 
 def looks_generic(title: str) -> bool:
     t = (title or "").strip().lower()
@@ -64,12 +92,17 @@ def looks_generic(title: str) -> bool:
     return t in GENERIC_TITLES or len(t) < 5
 
 def extract_alt_from_html(html: str) -> str | None:
-    if not html:
+    if not html or "<" not in html:  # 没有任何标签就不可能有 <img>
         return None
-    m = ALT_IMG_RE.search(html)
-    if not m:
+    try:
+        # 用 C 实现的 HTML 解析器取第一个带 alt 的 <img>（属性值已做实体反转义）
+        node = LexborHTMLParser(html).css_first("img[alt]")
+        alt = node.attributes.get("alt") if node is not None else None
+    except Exception:
+        m = ALT_IMG_RE.search(html)
+        alt = m.group("alt") if m else None
+    if alt is None:
         return None
-    alt = m.group("alt") or ""
     alt = clean_html_text(alt)
     alt = fix_mojibake(alt)
     return alt or None
@@ -92,36 +125,40 @@ def get_entry_title(entry) -> str:
                 html_blobs.append(v)
     if entry.get("summary"):
         html_blobs.append(entry.get("summary"))
+    # summary 常与某个 content 完全相同（ScienceDirect 等）：按内容去重，保持顺序，每段只解析一次
+    html_blobs = list(dict.fromkeys(html_blobs))
 
-    alt_candidates = []
+    # 单遍记录最长的 alt（长度相同取先出现的）
+    best_alt, best_len = "", 0
     for blob in html_blobs:
         alt_txt = extract_alt_from_html(blob)
-        if alt_txt:
-            alt_candidates.append(alt_txt)
+        if alt_txt and len(alt_txt) > best_len:
+            best_alt, best_len = alt_txt, len(alt_txt)
 
-    if looks_generic(title_from_feed) and alt_candidates:
-        return max(alt_candidates, key=len)
+    if best_alt and looks_generic(title_from_feed):
+        return best_alt
 
-    if title_from_feed and alt_candidates:
-        best_alt = max(alt_candidates, key=len)
-        if (len(best_alt) >= len(title_from_feed) + 10) and (not looks_generic(best_alt)):
+    if title_from_feed and best_alt:
+        if (best_len >= len(title_from_feed) + 10) and (not looks_generic(best_alt)):
             return best_alt
 
-    return title_from_feed or (alt_candidates[0] if alt_candidates else "")
+    return title_from_feed or best_alt
 
 def parse_date_strict(d: str) -> datetime | None:
     """
-    尝试把自由格式日期字符串转 UTC aware。
-    先用 pandas.to_datetime；失败返回 None。
+    尝试把自由格式日期字符串转 UTC aware（只在 feedparser 没给出 *_parsed 时才会走到这里，
+    即 RFC 2822 / ISO 8601 已被 feedparser 拒绝的格式，如 "October 11, 2025"）。
+    用 dateutil 宽松解析；失败返回 None。无时区信息的按 UTC 处理。
     """
     if not d:
         return None
     try:
-        ts = pd.to_datetime(d, utc=True, errors="raise")
-        # 转为 python datetime（UTC aware）
-        return ts.to_pydatetime()
-    except Exception:
+        dt = dateutil_parser.parse(d)
+    except (TypeError, ValueError, OverflowError):
         return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
 
 def parse_available_online_date(description_html: str) -> datetime | None:
     """
@@ -138,7 +175,7 @@ def parse_available_online_date(description_html: str) -> datetime | None:
     # 手动解析，避免区域设置问题
     parts = date_str.split()
     if len(parts) != 3:
-        # 尝试用 pandas 宽松解析
+        # 格式不符，交给通用解析
         return parse_date_strict(date_str)
     day_s, month_s, year_s = parts
     try:
@@ -155,8 +192,8 @@ def parse_available_online_date(description_html: str) -> datetime | None:
 def get_entry_pub_date(entry) -> datetime | None:
     """
     统一获取发布时间（UTC aware）：
-    1) published_parsed / updated_parsed
-    2) published / updated 字符串
+    1) published_parsed / updated_parsed（feedparser 已解析好的 struct_time，绝大多数条目在此返回）
+    2) published / updated 字符串（标准库解析）
     3) 从 description 中解析 "Available online ..."
     """
     t = entry.get("published_parsed") or entry.get("updated_parsed")
@@ -177,59 +214,59 @@ def get_entry_pub_date(entry) -> datetime | None:
 
 # ---------- 主流程 ----------
 
-# 读取RSS源列表（已改名）
-with open("feeds1011.txt", "r", encoding="utf-8") as f:
-    urls = [line.strip() for line in f if line.strip()]
-
 # 当前日期（UTC）
 today = datetime.now(timezone.utc).date()
 # 昨天（UTC）
 yesterday = today - timedelta(days=1)
+# 日期过滤用整数序号比较，逐条目不再构造 date 对象（datetime.toordinal() 只看日期部分）
+YESTERDAY_ORD = yesterday.toordinal()
+
+# 标题标准化（去首尾空白、忽略大小写）后在线去重（保留最早）：title_norm -> (pub_date, row)
+# 单遍 O(n)，只保留 k 个不同标题，不需要整表排序
+best: dict[str, tuple[datetime, dict]] = {}
 
-records = []
+# 抓取与解析由 fetch_all 统一完成（并发 + 条件 GET + 当日 pickle，同一天内多次运行只抓一次）
+feeds = fetch_all.load_or_fetch(today)
 
-for url in urls:
-    feed = feedparser.parse(url)
+for url, feed in feeds.items():
     source_title = feed.feed.get("title", url)
 
     for entry in feed.entries:
         pub_date = get_entry_pub_date(entry)
 
-        # 过滤：只收昨天（UTC 日期）
-        if pub_date and pub_date.date() == yesterday:
-            title = get_entry_title(entry)
-            link = entry.get("link") or ""
-            records.append({
-                "title": title,
-                "link": link,
-                "published": pub_date.strftime("%Y-%m-%d %H:%M:%S %Z"),
-                "source": source_title,
-                "pub_date": pub_date  # aware datetime (UTC)
-            })
-
-# 转 DataFrame
-df = pd.DataFrame(records)
-
-# 输出
+        # 过滤：只收昨天（UTC 日期）；先判日期再提取标题，标题清洗只对命中的条目做
+        if not pub_date or pub_date.toordinal() != YESTERDAY_ORD:
+            continue
+
+        title = get_entry_title(entry)
+        key = (title or "").strip().lower()
+        if key in best and pub_date >= best[key][0]:
+            continue
+
+        best[key] = (pub_date, {
+            "title": title,
+            "link": entry.get("link") or "",
+            "published": pub_date.strftime("%Y-%m-%d %H:%M:%S %Z"),
+            "source": source_title,
+            "pub_date": pub_date  # aware datetime (UTC)
+        })
+
+# 输出：直接逐行写 CSV，不再经过 DataFrame
 os.makedirs("output", exist_ok=True)
 file_name = f"output/news_{yesterday.strftime('%Y-%m-%d')}.csv"
 
-if df.empty:
-    df.to_csv(file_name, index=False, encoding="utf-8-sig")
-    print(f"✅ 抓取完成，共 0 条，已保存到 {file_name}")
-    print(f"时间范围：{yesterday} (UTC 日期)")
-else:
-    # 统一 pub_date 为 UTC aware，避免排序类型冲突
-    df["pub_date"] = pd.to_datetime(df["pub_date"], utc=True)
-
-    # 标题标准化后去重（保留最早）
-    df["title_norm"] = df["title"].fillna("").str.strip()
-    df_sorted = df.sort_values(by="pub_date", ascending=True)
-    df_dedup = df_sorted.drop_duplicates(subset="title_norm", keep="first") \
-                        .drop(columns=["title_norm"])
+# 按 pub_date 升序输出（与原先一致）；只对去重后的 k 条排序
+rows = [row for _, row in sorted(best.values(), key=lambda t: t[0])]
 
-    df_dedup.to_csv(file_name, index=False, encoding="utf-8-sig")
+with open(file_name, "w", newline="", encoding="utf-8-sig") as f:
+    w = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS, lineterminator="\n")
+    w.writeheader()
+    w.writerows(rows)
 
-    print(f"✅ 抓取完成，共 {len(df_dedup)} 条，已保存到 {file_name}")
-    print(f"时间范围：{yesterday} (UTC 日期)")
+pq.write_table(
+    pa.Table.from_pylist(rows, schema=PARQUET_SCHEMA),
+    file_name.replace(".csv", ".parquet"),
+)
 
+print(f"✅ 抓取完成，共 {len(best)} 条，已保存到 {file_name}")
+print(f"时间范围：{yesterday} (UTC 日期)")
@@ -2,20 +2,59 @@
 import os
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
+from pyarrow import csv as pacsv
+import pyarrow.parquet as pq
+
+# numba 可选：安装了且记录数足够多时，用 JIT 的单遍循环做“按 key 取最早”；否则走 pandas groupby
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 OUTPUT_DIR = Path("output")
 WEEKLY_DIR = OUTPUT_DIR / "weekly"
 WEEKLY_DIR.mkdir(parents=True, exist_ok=True)
 
+# 小于该行数时 JIT 加载/编译的开销不划算，直接用 groupby
+NUMBA_MIN_ROWS = 100_000
+
+if njit is not None:
+    @njit(cache=True)
+    def _min_by_key(codes, times, n_keys):
+        # codes 为 0..n_keys-1 的分组编号；返回每组 times 最小的行位置（并列取先出现的）
+        best = np.full(n_keys, -1, dtype=np.int64)
+        for i in range(codes.shape[0]):
+            k = codes[i]
+            j = best[k]
+            if j < 0 or times[i] < times[j]:
+                best[k] = i
+        return best
+else:
+    _min_by_key = None
+
+def earliest_index(pub_key, key_cols):
+    """
+    每个 key 取 pub_key 最早的那行，返回行索引（按 key 首次出现的顺序）。
+    pub_key 不能含 NaT（调用方先填充）。
+    """
+    if _min_by_key is not None and len(key_cols) == 1 and len(pub_key) >= NUMBA_MIN_ROWS:
+        codes, uniques = pd.factorize(key_cols[0], sort=False)
+        times = pub_key.dt.tz_convert(None).to_numpy().view("int64")
+        pos = _min_by_key(codes.astype(np.int64), times, len(uniques))
+        return pub_key.index[pos]
+    return pub_key.groupby(key_cols, sort=False).idxmin()
+
 def daily_file_for(d):
     return OUTPUT_DIR / f"news_{d.strftime('%Y-%m-%d')}.csv"
 
-def normalize_pub_date(df):
-    if "pub_date" in df.columns:
-        # 统一为 UTC aware，避免 sort 时类型冲突
-        df["pub_date"] = pd.to_datetime(df["pub_date"], utc=True, errors="coerce")
-    return df
+def read_daily(f):
+    # 优先读日抓取同时写出的 parquet（类型已保留）；没有则用 pyarrow 多线程读 CSV
+    pq_path = f.with_suffix(".parquet")
+    if pq_path.exists():
+        return pq.read_table(pq_path).to_pandas()
+    return pacsv.read_csv(f).to_pandas()
 
 def aggregate_last_week():
     # 周一执行时，把“上一周（周一~周日）”做汇总
@@ -49,8 +88,8 @@ def aggregate_last_week():
     dfs = []
     for f in files:
         try:
-            df = pd.read_csv(f)
-            df = normalize_pub_date(df)
+            # pub_date 在读取时即为时间戳；合并后再统一一次时区
+            df = read_daily(f)
             dfs.append(df)
         except Exception as e:
             print(f"Skip {f} due to error: {e}")
@@ -63,16 +102,24 @@ def aggregate_last_week():
         return
 
     all_df = pd.concat(dfs, ignore_index=True)
+    # 统一为 UTC aware（合并后只转一次），避免比较时类型冲突
+    if "pub_date" in all_df.columns:
+        all_df["pub_date"] = pd.to_datetime(all_df["pub_date"], utc=True, errors="coerce")
 
     # 去重策略：优先按标准化标题，必要时叠加 link
-    all_df["title_norm"] = all_df.get("title", "").fillna("").astype(str).str.strip()
+    # 标准化标题与日抓取一致：去首尾空白、忽略大小写
+    all_df["title_norm"] = all_df.get("title", "").fillna("").astype(str).str.strip().str.lower()
     subset_cols = ["title_norm"]  # 可换成 ["title_norm", "link"] 提升鲁棒性
 
-    # 排序 + 去重（保留最早）
+    # 去重（保留最早）：分组取 pub_date 最小的行，不做整表排序；NaT 视为最晚
     if "pub_date" in all_df.columns:
-        all_df = all_df.sort_values(by="pub_date", ascending=True)
-
-    dedup = all_df.drop_duplicates(subset=subset_cols, keep="first").drop(columns=["title_norm"])
+        pub_key = all_df["pub_date"].fillna(pd.Timestamp.max.tz_localize("UTC"))
+        idx = earliest_index(pub_key, [all_df[c] for c in subset_cols])
+        # 输出保持按 pub_date 升序；只对去重后的小表排序
+        dedup = all_df.loc[idx].sort_values(by="pub_date", kind="stable")
+    else:
+        dedup = all_df.drop_duplicates(subset=subset_cols, keep="first")
+    dedup = dedup.drop(columns=["title_norm"])
 
     # 输出名：按 ISO 周
     iso_last = last_sunday.isocalendar()